@@ -1,21 +1,89 @@
 import os
+import re
+import time
 import httpx
-from typing import Dict, Any
-from fastapi import FastAPI
-from pydantic import BaseModel
+import logging
+import orjson
+import asyncio
+from typing import Annotated, Dict, Any, List, Optional, Set, Tuple, Hashable, Callable, Awaitable, AsyncIterator
+from contextlib import asynccontextmanager
+from cachetools import TTLCache
+from diskcache import Cache as DiskCache
+from redis.asyncio import Redis
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, StringConstraints
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 from fastapi.middleware.cors import CORSMiddleware
 
+logging.basicConfig(level=logging.INFO)
+# httpx logs every request URL at INFO, which includes the NewsData apikey
+# query parameter and users' city/topic queries
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 NEWSDATA_KEY = os.getenv("NEWSDATA_API_KEY")
 OPENROUTER_KEY = os.getenv("OPENROUTER_API_KEY")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
+# Each worker keeps its own in-process caches
+WORKERS = int(os.getenv("WORKERS", os.cpu_count() or 1))
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH")  # optional on-disk geocode cache directory
+REDIS_URL = os.getenv("REDIS_URL")  # optional shared cache across workers
+# How long /chat waits to group OpenRouter calls into one batch (0 = send immediately)
+OPENROUTER_BATCH_WINDOW_MS = float(os.getenv("OPENROUTER_BATCH_WINDOW_MS", "0"))
+# Answer tool calls with a local template instead of a second LLM round-trip
+SKIP_TOOL_SUMMARIZATION = os.getenv("SKIP_LLM_SUMMARY", "0") == "1"
+# Smaller model used only to phrase tool results for the follow-up call
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "meta-llama/llama-3.2-3b-instruct")
+# Route plain "weather in X" / "news about Y" messages to tools without the LLM (opt-in)
+FAST_INTENT_ROUTING = os.getenv("FAST_INTENT_ROUTING", "0") == "1"
+
+# Shared HTTP client (connection pooling + keep-alive across requests)
+_client: Optional[httpx.AsyncClient] = None
+
+def _new_http_client() -> httpx.AsyncClient:
+    # One client for all upstream hosts; httpx pools connections per host and
+    # HTTP/2 multiplexes the back-to-back OpenRouter calls over one connection
+    return httpx.AsyncClient(
+        timeout=30.0,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=30.0,
+        ),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it lazily when used outside the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _new_http_client()
+    return _client
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _client
+    _client = _new_http_client()
+    app.state.http = _client
+    try:
+        yield
+    finally:
+        await _openrouter_batcher.aclose()
+        await _client.aclose()
+        _client = None
+        if _redis is not None:
+            await asyncio.gather(*_redis_writes, return_exceptions=True)
+            await _redis.aclose()
+        if _geocode_disk is not None:
+            _geocode_disk.close()
 
 # MCP server and FastAPI app
 mcp = FastMCP("WeatherNewsMCP")
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,81 +96,238 @@ app.add_middleware(
 # Store tool functions for manual access
 tool_functions = {}
 
+# In-process TTL caches for tool results
+_weather_cache: TTLCache = TTLCache(maxsize=1024, ttl=600)
+_news_cache: TTLCache = TTLCache(maxsize=512, ttl=900)
+GEOCODE_TTL = 86400 * 7
+_geocode_cache: TTLCache = TTLCache(maxsize=4096, ttl=GEOCODE_TTL)
+# SQLite-backed, so safe to share between worker processes
+_geocode_disk: Optional[DiskCache] = DiskCache(GEOCODE_CACHE_PATH) if GEOCODE_CACHE_PATH else None
+# Upstream fetches in progress, shared by concurrent callers of the same key
+_inflight: Dict[Hashable, asyncio.Future] = {}
+
+# Shared L2 cache behind the in-process caches (disabled when REDIS_URL is unset)
+# Short socket timeouts so an unreachable Redis degrades to a miss instead of hanging
+_redis: Optional[Redis] = (
+    Redis.from_url(REDIS_URL, socket_connect_timeout=0.3, socket_timeout=0.3) if REDIS_URL else None
+)
+# Background SETEX writes, kept referenced until they finish
+_redis_writes: Set[asyncio.Task] = set()
+
+async def _redis_get(redis_key: str) -> Optional[Tuple[Dict[str, Any], Optional[float]]]:
+    """Return (result, remaining TTL in seconds) for redis_key, or None on a miss."""
+    try:
+        async with _redis.pipeline(transaction=False) as pipe:
+            raw, pttl = await pipe.get(redis_key).pttl(redis_key).execute()
+    except Exception:
+        logger.warning("redis GET %s failed", redis_key, exc_info=True)
+        return None
+    if raw is None:
+        return None
+    # PTTL is -1 for keys without an expiry
+    return orjson.loads(raw), (pttl / 1000 if pttl >= 0 else None)
+
+async def _redis_set(redis_key: str, ttl: int, result: Dict[str, Any]) -> None:
+    try:
+        await _redis.setex(redis_key, ttl, orjson.dumps(result))
+    except Exception:
+        logger.warning("redis SETEX %s failed", redis_key, exc_info=True)
+
+async def _cached_fetch(
+    cache: TTLCache,
+    key: Hashable,
+    fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    redis_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Return a cached result for key, fetching it once even under concurrent misses.
+
+    Lookups go to the in-process cache first, then Redis (when configured and
+    redis_key is given), then upstream. Concurrent misses for the same key await
+    a single in-flight fetch ("singleflight") instead of each hitting upstream.
+    """
+    # Single lookup: a separate `in` check can pass and then expire before the read
+    # Entries are (expires_at, result) so Redis hits can live shorter than cache.ttl
+    cached = cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    flight_key = (id(cache), key)
+    flight = _inflight.get(flight_key)
+    if flight is None:
+        flight = asyncio.ensure_future(_load(cache, key, fetch, redis_key))
+        _inflight[flight_key] = flight
+        flight.add_done_callback(lambda f: _finish_flight(flight_key, f))
+    # Shield so one cancelled caller does not cancel the fetch for the others
+    return await asyncio.shield(flight)
+
+def _finish_flight(flight_key: Hashable, flight: asyncio.Future) -> None:
+    _inflight.pop(flight_key, None)
+    # Mark any exception as retrieved; if every caller was cancelled nobody else will
+    if not flight.cancelled():
+        flight.exception()
+
+async def _load(
+    cache: TTLCache,
+    key: Hashable,
+    fetch: Callable[[], Awaitable[Dict[str, Any]]],
+    redis_key: Optional[str],
+) -> Dict[str, Any]:
+    use_redis = _redis is not None and redis_key is not None
+    if use_redis:
+        hit = await _redis_get(redis_key)
+        if hit is not None:
+            result, remaining = hit
+            # Don't keep a Redis hit locally past its expiry in Redis
+            ttl = cache.ttl if remaining is None else min(remaining, cache.ttl)
+            cache[key] = (time.monotonic() + ttl, result)
+            return result
+    result = await fetch()
+    # Errors are not cached so the next call retries upstream
+    if "error" not in result:
+        cache[key] = (time.monotonic() + cache.ttl, result)
+        if use_redis:
+            # Write back in the background; the caller doesn't wait on Redis
+            task = asyncio.create_task(_redis_set(redis_key, int(cache.ttl), result))
+            _redis_writes.add(task)
+            task.add_done_callback(_redis_writes.discard)
+    return result
+
+# Weather code mapping (WMO codes used by Open-Meteo), indexed directly by code 0-99
+_WMO_CODES = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog", 51: "Light drizzle", 53: "Moderate drizzle",
+    55: "Dense drizzle", 56: "Light freezing drizzle", 57: "Dense freezing drizzle",
+    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain", 66: "Light freezing rain",
+    67: "Heavy freezing rain", 71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
+    77: "Snow grains", 80: "Slight rain showers", 81: "Moderate rain showers",
+    82: "Violent rain showers", 85: "Slight snow showers", 86: "Heavy snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
+}
+_WMO_DESC = tuple(_WMO_CODES.get(i, "Unknown") for i in range(100))
+
 # ======================
 # MCP Tools
 # ======================
 
 @mcp.tool()
-async def getWeather(city: str) -> Dict[str, Any]:
-    """Fetch weather for any city worldwide using Open-Meteo API (free, no API key needed)."""
+async def getWeather(city: str, include_forecast: bool = True) -> Dict[str, Any]:
+    """Fetch weather for any city worldwide using Open-Meteo API (free, no API key needed).
+
+    Set include_forecast to False to fetch only current conditions.
+    """
+    city_key = city.strip().lower()
+    key = (city_key, include_forecast)
+    redis_key = f"weather:{city_key}" if include_forecast else f"weather:{city_key}:current"
+    return await _cached_fetch(_weather_cache, key, lambda: _fetch_weather(city, include_forecast), redis_key)
+
+async def _read_geocode_disk(key: str) -> Optional[Dict[str, Any]]:
+    if _geocode_disk is None:
+        return None
+    try:
+        # Disk I/O runs off the event loop
+        return await asyncio.to_thread(_geocode_disk.get, key)
+    except Exception:
+        logger.warning("could not read geocode cache %s", GEOCODE_CACHE_PATH, exc_info=True)
+        return None
+
+async def _write_geocode_disk(key: str, location: Dict[str, Any]) -> None:
+    if _geocode_disk is None:
+        return
+    try:
+        await asyncio.to_thread(_geocode_disk.set, key, location, expire=GEOCODE_TTL)
+    except Exception:
+        logger.warning("could not write geocode cache %s", GEOCODE_CACHE_PATH, exc_info=True)
+
+async def _fetch_geocode(city: str, key: str) -> Dict[str, Any]:
+    location = await _read_geocode_disk(key)
+    if location is not None:
+        return location
+
+    # OpenStreetMap Nominatim (free geocoding)
+    geocode_url = "https://nominatim.openstreetmap.org/search"
+    params = {"q": city, "format": "json", "limit": 1}
+    geo_resp = await get_http_client().get(geocode_url, params=params, timeout=10.0)
+    geo_resp.raise_for_status()
+    geo_data = geo_resp.json()
+
+    if not geo_data:
+        return {"error": f"City '{city}' not found."}
+
+    location = {
+        "lat": float(geo_data[0]["lat"]),
+        "lon": float(geo_data[0]["lon"]),
+        "display_name": geo_data[0].get("display_name", city),
+    }
+    await _write_geocode_disk(key, location)
+    return location
+
+async def _geocode(city: str) -> Optional[Tuple[float, float, str]]:
+    """Resolve a city to (lat, lon, display_name); cached for days since it rarely changes."""
+    key = city.strip().lower()
+    location = await _cached_fetch(_geocode_cache, key, lambda: _fetch_geocode(city, key))
+    if "error" in location:
+        return None
+    return location["lat"], location["lon"], location["display_name"]
+
+async def _fetch_weather(city: str, include_forecast: bool = True) -> Dict[str, Any]:
     try:
-        # First, get coordinates using OpenStreetMap Nominatim (free geocoding)
-        geocode_url = "https://nominatim.openstreetmap.org/search"
-        params = {"q": city, "format": "json", "limit": 1}
+        # First, get coordinates (cached separately from the forecast)
+        location = await _geocode(city)
+        if location is None:
+            return {"error": f"City '{city}' not found."}
+        lat, lon, display_name = location
+
+        client = get_http_client()
+
+        # Get weather data from Open-Meteo (free, global coverage)
+        weather_url = "https://api.open-meteo.com/v1/forecast"
+        weather_params = {
+            "latitude": lat,
+            "longitude": lon,
+            "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m,wind_direction_10m",
+            "timezone": "auto"
+        }
+        if include_forecast:
+            weather_params["daily"] = "temperature_2m_max,temperature_2m_min,weather_code,precipitation_sum"
+            weather_params["forecast_days"] = 1
         
-        async with httpx.AsyncClient() as client:
-            # Get coordinates
-            geo_resp = await client.get(geocode_url, params=params, timeout=10.0)
-            geo_data = geo_resp.json()
-            
-            if not geo_data:
-                return {"error": f"City '{city}' not found."}
-            
-            lat = float(geo_data[0]["lat"])
-            lon = float(geo_data[0]["lon"])
-            display_name = geo_data[0].get("display_name", city)
-
-            # Get weather data from Open-Meteo (free, global coverage)
-            weather_url = "https://api.open-meteo.com/v1/forecast"
-            weather_params = {
-                "latitude": lat,
-                "longitude": lon,
-                "current": "temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m,wind_direction_10m",
-                "daily": "temperature_2m_max,temperature_2m_min,weather_code,precipitation_sum",
-                "forecast_days": 1,
-                "timezone": "auto"
-            }
-            
-            weather_resp = await client.get(weather_url, params=weather_params, timeout=10.0)
-            weather_data = weather_resp.json()
-            
-            if "current" not in weather_data:
-                return {"error": "Weather data not available for this location"}
-            
-            current = weather_data["current"]
-            daily = weather_data["daily"]
-            
-            # Weather code mapping (WMO codes used by Open-Meteo)
-            weather_codes = {
-                0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-                45: "Fog", 48: "Depositing rime fog", 51: "Light drizzle", 53: "Moderate drizzle",
-                55: "Dense drizzle", 56: "Light freezing drizzle", 57: "Dense freezing drizzle",
-                61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain", 66: "Light freezing rain",
-                67: "Heavy freezing rain", 71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-                77: "Snow grains", 80: "Slight rain showers", 81: "Moderate rain showers",
-                82: "Violent rain showers", 85: "Slight snow showers", 86: "Heavy snow showers",
-                95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
-            }
-            
-            weather_desc = weather_codes.get(current.get("weather_code", 0), "Unknown")
-            
-            return {
-                "city": city,
-                "location": display_name,
-                "temperature": round(current.get("temperature_2m", 0), 1),
-                "temperatureUnit": "°C",
-                "humidity": current.get("relative_humidity_2m", 0),
-                "windSpeed": current.get("wind_speed_10m", 0),
-                "windDirection": current.get("wind_direction_10m", 0),
-                "weather": weather_desc,
-                "forecast": {
-                    "maxTemp": round(daily["temperature_2m_max"][0], 1) if daily.get("temperature_2m_max") else None,
-                    "minTemp": round(daily["temperature_2m_min"][0], 1) if daily.get("temperature_2m_min") else None,
-                    "precipitation": daily["precipitation_sum"][0] if daily.get("precipitation_sum") else 0
-                },
-                "coordinates": {"lat": lat, "lon": lon}
+        weather_resp = await client.get(weather_url, params=weather_params, timeout=10.0)
+        if weather_resp.status_code != 200:
+            return {"error": "Weather data not available for this location"}
+        weather_data = weather_resp.json()
+        
+        if "current" not in weather_data:
+            return {"error": "Weather data not available for this location"}
+        
+        current = weather_data["current"]
+        
+        weather_code = current.get("weather_code", 0)
+        if isinstance(weather_code, int) and 0 <= weather_code < len(_WMO_DESC):
+            weather_desc = _WMO_DESC[weather_code]
+        else:
+            weather_desc = "Unknown"
+        
+        weather = {
+            "city": city,
+            "location": display_name,
+            "temperature": current.get("temperature_2m", 0),
+            "temperatureUnit": "°C",
+            "humidity": current.get("relative_humidity_2m", 0),
+            "windSpeed": current.get("wind_speed_10m", 0),
+            "windDirection": current.get("wind_direction_10m", 0),
+            "weather": weather_desc,
+            "coordinates": {"lat": lat, "lon": lon}
+        }
+        if include_forecast:
+            daily = weather_data.get("daily", {})
+            weather["forecast"] = {
+                "maxTemp": daily["temperature_2m_max"][0] if daily.get("temperature_2m_max") else None,
+                "minTemp": daily["temperature_2m_min"][0] if daily.get("temperature_2m_min") else None,
+                "precipitation": daily["precipitation_sum"][0] if daily.get("precipitation_sum") else 0
             }
+        return weather
             
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to fetch weather: geocoding service returned HTTP {e.response.status_code}"}
     except Exception as e:
         return {"error": f"Failed to fetch weather: {str(e)}"}
 
@@ -112,12 +337,16 @@ tool_functions["getWeather"] = getWeather
 @mcp.tool()
 async def getNews(topic: str) -> Dict[str, Any]:
     """Fetch news from NewsData.io free API."""
+    key = (topic.strip().lower(), "en", "us")
+    return await _cached_fetch(_news_cache, key, lambda: _fetch_news(topic), "news:" + ":".join(key))
+
+async def _fetch_news(topic: str) -> Dict[str, Any]:
     try:
         url = "https://newsdata.io/api/1/news"
         params = {"apikey": NEWSDATA_KEY, "q": topic, "language": "en", "country": "us", "page": 0}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params, timeout=10.0)
-            data = resp.json()
+        resp = await get_http_client().get(url, params=params, timeout=10.0)
+        resp.raise_for_status()
+        data = resp.json()
         
         articles = data.get("results", [])[:3]
         return {
@@ -127,6 +356,8 @@ async def getNews(topic: str) -> Dict[str, Any]:
                 for a in articles if a.get("title")
             ]
         }
+    except httpx.HTTPStatusError as e:
+        return {"error": f"Failed to fetch news: news service returned HTTP {e.response.status_code}"}
     except Exception as e:
         return {"error": f"Failed to fetch news: {str(e)}"}
 
@@ -137,134 +368,374 @@ tool_functions["getNews"] = getNews
 # Chatbot Endpoint
 # ======================
 
+# Tools exposed to OpenRouter function calling
+_TOOLS_SCHEMA = [
+    {
+        "type": "function",
+        "function": {
+            "name": "getWeather",
+            "description": "Get current weather for a city",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "city": {
+                        "type": "string",
+                        "description": "City name"
+                    },
+                    "include_forecast": {
+                        "type": "boolean",
+                        "description": "Also include today's high/low and precipitation (default true)"
+                    }
+                },
+                "required": ["city"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "getNews",
+            "description": "Get latest news for a topic",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "topic": {
+                        "type": "string",
+                        "description": "News topic"
+                    }
+                },
+                "required": ["topic"]
+            }
+        }
+    }
+]
+
+# OpenRouter API endpoint and headers
+_OR_REQUEST_URL = "https://openrouter.ai/api/v1/chat/completions"
+_OPENROUTER_HEADERS = {
+    "Authorization": f"Bearer {OPENROUTER_KEY}",
+    "Content-Type": "application/json"
+}
+
+def _build_openrouter_request(client: httpx.AsyncClient, payload: Dict[str, Any]) -> httpx.Request:
+    """Build a chat completion request from the prebuilt URL/headers and an orjson body."""
+    return client.build_request(
+        "POST",
+        _OR_REQUEST_URL,
+        headers=_OPENROUTER_HEADERS,
+        content=orjson.dumps(payload),
+        timeout=30.0
+    )
+
+class OpenRouterBatcher:
+    """Group OpenRouter completions arriving within a short window and send them together.
+
+    Chat completions cannot merge different conversations into one request, so each
+    batch is sent as parallel requests over the shared (HTTP/2) connection. With the
+    default window of 0 a request never waits: the worker only picks up whatever is
+    already queued alongside it.
+    """
+
+    def __init__(self, max_batch: int = 16, window: float = 0.0):
+        self.max_batch = max_batch
+        self.window = window
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    async def submit(self, payload: Dict[str, Any]) -> httpx.Response:
+        if self._worker is None or self._worker.done():
+            # Don't orphan anything left behind by a stopped worker
+            self._fail_pending()
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payload, future))
+        return await future
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._fail_pending()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    def _fail_pending(self) -> None:
+        if self._queue is None:
+            return
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("OpenRouter batcher closed"))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.window
+                while len(batch) < self.max_batch:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("OpenRouter batcher closed"))
+                raise
+            # Send in the background so the next window starts immediately
+            task = asyncio.create_task(self._send_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        await asyncio.gather(*(self._send(payload, future) for payload, future in batch))
+
+    async def _send(self, payload: Dict[str, Any], future: asyncio.Future) -> None:
+        try:
+            client = get_http_client()
+            response = await client.send(_build_openrouter_request(client, payload))
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(response)
+
+_openrouter_batcher = OpenRouterBatcher(window=OPENROUTER_BATCH_WINDOW_MS / 1000)
+
+def _format_tool_result(tool_name: str, tool_result: Dict[str, Any]) -> str:
+    """Render a tool result as plain text without calling the LLM."""
+    if "error" in tool_result:
+        return tool_result["error"]
+    if tool_name == "getWeather":
+        text = (
+            f"Weather in {tool_result['location']}: {tool_result['weather']}, "
+            f"{tool_result['temperature']}{tool_result['temperatureUnit']}, "
+            f"humidity {tool_result['humidity']}%, wind {tool_result['windSpeed']} km/h."
+        )
+        forecast = tool_result.get("forecast")
+        if forecast and forecast.get("maxTemp") is not None:
+            text += (
+                f" Today's high {forecast['maxTemp']}{tool_result['temperatureUnit']}, "
+                f"low {forecast['minTemp']}{tool_result['temperatureUnit']}, "
+                f"precipitation {forecast['precipitation']} mm."
+            )
+        return text
+    if tool_name == "getNews":
+        headlines = tool_result.get("headlines", [])
+        if not headlines:
+            return f"No news found about {tool_result['topic']}."
+        lines = [f"Latest news about {tool_result['topic']}:"]
+        lines += [f"- {h['title']} ({h['link']})" for h in headlines]
+        return "\n".join(lines)
+    return orjson.dumps(tool_result).decode()
+
+def _sse_event(data: Any, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {orjson.dumps(data).decode()}\n\n"
+
+async def _stream_answer(answer: str, tool_result: Any = None) -> AsyncIterator[str]:
+    """Emit an already complete answer as a single OpenAI-style SSE chunk."""
+    if tool_result is not None:
+        yield _sse_event(tool_result, "tool_result")
+    yield _sse_event({"choices": [{"delta": {"content": answer}}]})
+    yield "data: [DONE]\n\n"
+
+async def _stream_completion(
+    client: httpx.AsyncClient, payload: Dict[str, Any], tool_result: Any
+) -> AsyncIterator[str]:
+    """Relay OpenRouter's SSE token stream, preceded by the tool result."""
+    yield _sse_event(tool_result, "tool_result")
+    try:
+        request = _build_openrouter_request(client, {**payload, "stream": True})
+        response = await client.send(request, stream=True)
+        try:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                yield line + "\n"
+        finally:
+            await response.aclose()
+    except Exception:
+        logger.exception("chat stream failed")
+        yield _sse_event({"error": "Chat processing failed"}, "error")
+
+# Simple intents that can be dispatched to a tool without asking the LLM.
+# Both patterns must match the whole message; anything else goes to the LLM.
+# Words in the captured name are split by single spaces and the tail allows at most one
+# '.', so there is only one way to match and long inputs can't backtrack.
+_WEATHER_RE = re.compile(
+    r"^(?:(?:what(?:'s| is)|how(?:'s| is)) the )?(?:current )?(?:weather|temperature)(?: like)?"
+    r" (?:in|for) ([A-Za-z][A-Za-z.,'-]*(?: [A-Za-z.,'-]+)*?)(?:,? (?:right now|now|today))?\.?[?!]*$",
+    re.I,
+)
+_NEWS_RE = re.compile(
+    r"^(?:(?:show me|get me|give me|what(?:'s| is)) )?(?:the )?(?:latest |top )?(?:news|headlines)"
+    r" (?:about|on|for) ([A-Za-z0-9][A-Za-z0-9.&'-]*(?: [A-Za-z0-9.&'-]+)*)\.?[?!]*$",
+    re.I,
+)
+# Trivial queries are short; anything longer goes to the LLM without running the regexes
+_INTENT_MAX_LEN = 100
+# Words that mean the query is about another time or is more than a lookup
+_NOT_A_NAME = frozenset((
+    "tomorrow tonight yesterday week weekend month next last later moment "
+    "the in at for and or but if when why how what will should good bad explain"
+).split())
+
+def _plain_name(text: str, max_words: int) -> Optional[str]:
+    words = text.replace(",", " ").split()
+    if not words or len(words) > max_words or any(w.strip(".'-").lower() in _NOT_A_NAME for w in words):
+        return None
+    return text.strip(" ,.")
+
+def _match_intent(message: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """Return (tool_name, args) when the message is a trivial weather/news query."""
+    message = message.strip()
+    if len(message) > _INTENT_MAX_LEN:
+        return None
+    m = _WEATHER_RE.match(message)
+    if m:
+        city = _plain_name(m.group(1), max_words=4)
+        return ("getWeather", {"city": city}) if city else None
+    m = _NEWS_RE.match(message)
+    if m:
+        topic = _plain_name(m.group(1), max_words=4)
+        return ("getNews", {"topic": topic}) if topic else None
+    return None
+
 class ChatRequest(BaseModel):
-    message: str
+    # Reject empty or oversized messages before they are sent upstream
+    message: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=8000)]
 
 @app.post("/chat")
-async def chat(req: ChatRequest):
-    """Chat endpoint: user sends message, OpenRouter decides tool usage."""
+async def chat(req: ChatRequest, stream: bool = False):
+    """Chat endpoint: user sends message, OpenRouter decides tool usage.
+
+    With ?stream=1 the answer is sent as Server-Sent Events instead of one JSON body.
+    """
     try:
-        # Define tools for OpenRouter function calling
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "getWeather",
-                    "description": "Get current weather for a city",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "city": {
-                                "type": "string",
-                                "description": "City name"
-                            }
-                        },
-                        "required": ["city"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "getNews",
-                    "description": "Get latest news for a topic",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "topic": {
-                                "type": "string",
-                                "description": "News topic"
-                            }
-                        },
-                        "required": ["topic"]
-                    }
-                }
-            }
-        ]
+        # Answer trivial queries straight from the tool, skipping the LLM
+        intent = _match_intent(req.message) if FAST_INTENT_ROUTING else None
+        if intent is not None:
+            tool_name, args = intent
+            tool_result = await tool_functions[tool_name](**args)
+            # Fall through to the LLM on errors or empty news (e.g. the regex guessed wrong)
+            if "error" not in tool_result and tool_result.get("headlines", True):
+                answer = _format_tool_result(tool_name, tool_result)
+                if stream:
+                    return StreamingResponse(_stream_answer(answer, tool_result), media_type="text/event-stream")
+                return {"answer": answer, "tool_result": tool_result}
 
-        # OpenRouter API call
-        headers = {
-            "Authorization": f"Bearer {OPENROUTER_KEY}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "model": "openai/gpt-4o-mini",  # Using OpenAI model via OpenRouter
             "messages": [
                 {"role": "user", "content": req.message}
             ],
-            "tools": tools,
+            "tools": _TOOLS_SCHEMA,
             "tool_choice": "auto"
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30.0
-            )
+        client = get_http_client()
+        response = await _openrouter_batcher.submit(payload)
+        response.raise_for_status()
+        
+        result = orjson.loads(response.content)
+        
+        choices = result.get("choices")
+        if not choices:
+            raise HTTPException(status_code=502, detail="No response from OpenRouter")
+        message = choices[0]["message"]
+        tool_calls = message.get("tool_calls")
+        
+        if tool_calls:
+            # Process tool calls
+            for tool_call in tool_calls:
+                tool_name = tool_call["function"]["name"]
+                if tool_name not in tool_functions:
+                    raise HTTPException(status_code=502, detail=f"Tool '{tool_name}' not found")
             
-            result = response.json()
+            # Execute all requested tools concurrently
+            tool_results = await asyncio.gather(*[
+                tool_functions[tc["function"]["name"]](**orjson.loads(tc["function"]["arguments"]))
+                for tc in tool_calls
+            ])
+            tool_result = tool_results[0] if len(tool_results) == 1 else tool_results
             
-            # Check if there are tool calls
-            if "choices" in result and result["choices"]:
-                message = result["choices"][0]["message"]
-                
-                if "tool_calls" in message and message["tool_calls"]:
-                    # Process tool calls
-                    tool_call = message["tool_calls"][0]
-                    tool_name = tool_call["function"]["name"]
-                    
-                    import json
-                    args = json.loads(tool_call["function"]["arguments"])
-                    
-                    # Execute the tool function
-                    if tool_name in tool_functions:
-                        tool_result = await tool_functions[tool_name](**args)
-                        
-                        # Send result back to OpenRouter for final response
-                        follow_up_payload = {
-                            "model": "openai/gpt-4o-mini",
-                            "messages": [
-                                {"role": "user", "content": req.message},
-                                {"role": "assistant", "content": "", "tool_calls": message["tool_calls"]},
-                                {
-                                    "role": "tool",
-                                    "tool_call_id": tool_call["id"],
-                                    "content": json.dumps(tool_result)
-                                }
-                            ]
-                        }
-                        
-                        follow_up_response = await client.post(
-                            "https://openrouter.ai/api/v1/chat/completions",
-                            headers=headers,
-                            json=follow_up_payload,
-                            timeout=30.0
-                        )
-                        
-                        follow_up_result = follow_up_response.json()
-                        
-                        return {
-                            "answer": follow_up_result["choices"][0]["message"]["content"],
-                            "tool_result": tool_result
+            if SKIP_TOOL_SUMMARIZATION:
+                answer = "\n\n".join(
+                    _format_tool_result(tc["function"]["name"], output)
+                    for tc, output in zip(tool_calls, tool_results)
+                )
+                if stream:
+                    return StreamingResponse(_stream_answer(answer, tool_result), media_type="text/event-stream")
+                return {"answer": answer, "tool_result": tool_result}
+            
+            # Send results back to OpenRouter for final response
+            follow_up_payload = {
+                "model": SUMMARY_MODEL,
+                # Room for a short summary per tool result (weather plus a few headlines with links)
+                "max_tokens": 300 * len(tool_calls),
+                # Providers reject tool_calls/tool messages without the matching schema; "none"
+                # keeps the summary model from starting another round of tool calls
+                "tools": _TOOLS_SCHEMA,
+                "tool_choice": "none",
+                "messages": [
+                    {"role": "user", "content": req.message},
+                    {"role": "assistant", "content": "", "tool_calls": tool_calls},
+                    *[
+                        {
+                            "role": "tool",
+                            "tool_call_id": tc["id"],
+                            "content": orjson.dumps(output).decode()
                         }
-                    else:
-                        return {"error": f"Tool '{tool_name}' not found"}
-                
-                # No tool calls, return direct response
-                return {"answer": message["content"]}
-            else:
-                return {"error": "No response from OpenRouter"}
+                        for tc, output in zip(tool_calls, tool_results)
+                    ]
+                ]
+            }
+            
+            if stream:
+                return StreamingResponse(
+                    _stream_completion(client, follow_up_payload, tool_result),
+                    media_type="text/event-stream"
+                )
+            
+            follow_up_response = await _openrouter_batcher.submit(follow_up_payload)
+            follow_up_response.raise_for_status()
+            
+            follow_up_result = orjson.loads(follow_up_response.content)
+            
+            return {
+                "answer": follow_up_result["choices"][0]["message"]["content"],
+                "tool_result": tool_result
+            }
         
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        return {
-            "error": f"Chat processing failed: {str(e)}", 
-            "details": error_details
-        }
+        # No tool calls, return direct response
+        if stream:
+            return StreamingResponse(_stream_answer(message["content"]), media_type="text/event-stream")
+        return {"answer": message["content"]}
+        
+    except HTTPException:
+        raise
+    except httpx.HTTPStatusError as e:
+        logger.warning("OpenRouter returned HTTP %s", e.response.status_code)
+        raise HTTPException(
+            status_code=502, detail=f"OpenRouter request failed with HTTP {e.response.status_code}"
+        )
+    except Exception:
+        logger.exception("chat failed")
+        raise HTTPException(status_code=500, detail="Chat processing failed")
 
 # ======================
 # Health Check Endpoint
@@ -294,4 +765,13 @@ async def health():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # "auto" picks uvloop and httptools when installed (uvicorn[standard]),
+    # falling back to asyncio/h11 where they are unavailable (e.g. Windows)
+    uvicorn.run(
+        "chatbot_server:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=WORKERS,
+    )
@@ -0,0 +1,42 @@
+import time
+import unittest
+
+from chatbot_server import _NEWS_RE, _WEATHER_RE, _match_intent
+
+
+class MatchIntentTest(unittest.TestCase):
+    def test_plain_queries_are_routed(self):
+        self.assertEqual(_match_intent("What's the weather in Tokyo?"), ("getWeather", {"city": "Tokyo"}))
+        self.assertEqual(_match_intent("weather in St. Louis?"), ("getWeather", {"city": "St. Louis"}))
+        self.assertEqual(
+            _match_intent("Latest news about artificial intelligence"),
+            ("getNews", {"topic": "artificial intelligence"}),
+        )
+
+    def test_other_queries_go_to_the_llm(self):
+        for message in [
+            "What's the weather in Paris tomorrow?",
+            "weather in London good for a picnic",
+            "forecast for Berlin next week",
+            "Should I trust news on social media?",
+            "Summarize the news about Tesla and explain why the stock dropped",
+        ]:
+            with self.subTest(message=message):
+                self.assertIsNone(_match_intent(message))
+
+    def test_long_adversarial_input_is_fast(self):
+        # Regression test: these inputs used to backtrack for seconds to minutes
+        for prefix in ("weather in a", "news about a"):
+            for filler in (" ", ".", " a", ". "):
+                message = prefix + filler * (8000 // len(filler)) + "#"
+                with self.subTest(prefix=prefix, filler=filler):
+                    start = time.perf_counter()
+                    self.assertIsNone(_match_intent(message))
+                    # The length cap protects _match_intent; the patterns must be linear too
+                    self.assertIsNone(_WEATHER_RE.match(message))
+                    self.assertIsNone(_NEWS_RE.match(message))
+                    self.assertLess(time.perf_counter() - start, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()